@@ -0,0 +1,103 @@
+import os
+import json
+import bisect
+import datetime
+import numpy as np
+from skyfield import almanac
+from data_loader import CACHE_DIR
+from sky_engine import illuminated_fraction
+
+TWILIGHT_NAMES = ["Night", "Astronomical twilight", "Nautical twilight", "Civil twilight", "Day"]
+ALMANAC_DAYS = 7 # one week per table
+
+def _cache_path(city_data, start_date, days):
+    # one file per site and start date
+    name = f"almanac_{city_data['lat']:.4f}_{city_data['lon']:.4f}_{start_date.isoformat()}_{days}d.json"
+    return os.path.join(CACHE_DIR, name)
+
+def _iso(times):
+    return list(times.utc_iso())
+
+def compute_almanac(engine, names, t0, t1):
+    # rise/transit/set for every named body, one vectorized search per body and event type
+    table = {'bodies': {}, 'twilight': []}
+    for name in names:
+        body = engine.bodies[name]
+        rises, rises_real = almanac.find_risings(engine.observer, body, t0, t1)
+        sets, sets_real = almanac.find_settings(engine.observer, body, t0, t1)
+        transits = almanac.find_transits(engine.observer, body, t0, t1)
+        events = {
+            'rise': _iso(rises[rises_real]),
+            'transit': _iso(transits),
+            'set': _iso(sets[sets_real]),
+        }
+        if name == "Moon":
+            # phase at each moonrise, in degrees (0 new, 180 full) and illuminated fraction
+            moon_rises = rises[rises_real]
+            events['phase'] = [float(p) for p in almanac.moon_phase(engine.planets, moon_rises).degrees]
+            events['illum'] = []
+            if len(moon_rises):
+                pos = engine.positions(["Moon", "Sun"], moon_rises)
+                moon_sun = np.moveaxis(pos['xyz'] * pos['distance_km'][:, None, :], 1, 0) # (3, 2, m)
+                events['illum'] = [float(f) for f in illuminated_fraction(moon_sun[:, 0], moon_sun[:, 1])]
+        table['bodies'][name] = events
+
+    ## twilight stages (transitions between night, astronomical, nautical, civil and day)
+    stage_at = almanac.dark_twilight_day(engine.planets, engine.topos)
+    times, levels = almanac.find_discrete(t0, t1, stage_at)
+    table['twilight_start'] = int(stage_at(t0))
+    table['twilight'] = [[iso, int(level)] for iso, level in zip(_iso(times), levels)]
+    return table
+
+def load_almanac(engine, names, city_data, tz, days=ALMANAC_DAYS):
+    # week of almanac tables starting at local midnight, read from disk if we already did this site/date
+    start = datetime.datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    path = _cache_path(city_data, start.date(), days)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return _with_lookups(json.load(f))
+        except (OSError, ValueError):
+            pass # corrupted cache, recompute
+
+    t0 = engine.ts.from_datetime(start)
+    t1 = engine.ts.from_datetime(start + datetime.timedelta(days=days))
+    table = compute_almanac(engine, names, t0, t1)
+    table['start'] = start.date().isoformat()
+    table['days'] = days
+
+    # write then rename, so another session at the same site never reads half a file
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(table, f)
+    os.replace(tmp_path, path)
+    return _with_lookups(table)
+
+def _with_lookups(table):
+    # event times parsed once into sorted epoch seconds, so per-frame lookups are a bisect
+    table['lookup'] = {
+        name: {kind: [parse_time(iso).timestamp() for iso in events.get(kind, [])] for kind in ('rise', 'transit', 'set')}
+        for name, events in table['bodies'].items()
+    }
+    table['twilight_lookup'] = [parse_time(iso).timestamp() for iso, _ in table['twilight']]
+    return table
+
+def parse_time(iso):
+    return datetime.datetime.strptime(iso, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=datetime.timezone.utc)
+
+def next_events(table, name, now):
+    # next rise/transit/set after `now` (aware datetime), None when not in the table
+    times = table['lookup'].get(name, {})
+    stamp = now.timestamp()
+    upcoming = {}
+    for kind in ('rise', 'transit', 'set'):
+        stamps = times.get(kind, [])
+        i = bisect.bisect_right(stamps, stamp)
+        upcoming[kind] = datetime.datetime.fromtimestamp(stamps[i], datetime.timezone.utc) if i < len(stamps) else None
+    return upcoming
+
+def twilight_now(table, now):
+    # current twilight stage from the last transition before `now`
+    i = bisect.bisect_right(table['twilight_lookup'], now.timestamp())
+    return TWILIGHT_NAMES[table['twilight'][i - 1][1] if i > 0 else table['twilight_start']]
@@ -0,0 +1,222 @@
+import threading
+import itertools
+import numpy as np
+from sgp4.api import SatrecArray
+from skyfield.constants import DAY_S
+from sky_engine import sgp4_epoch
+
+MAX_RELATIVE_SPEED = 15.5 # km/s, two LEO objects head-on
+MAX_TIDAL_ACCEL = 3 * 398600.4418 / 6528.0**3 # 1/s^2, relative acceleration per km of separation (150 km up)
+SHELL_MARGIN_KM = 50.0 # osculating radii wander this far around the mean-element perigee/apogee
+REFINE_BATCH = 256 # sample times per SGP4 call when refining
+NEIGHBOUR_OFFSETS = np.array(list(itertools.product((-1, 0, 1), repeat=3)))
+
+def orbit_shells(satellites):
+    # (perigee, apogee) altitudes in km straight from the TLE elements
+    perigee = np.array([sat.model.altp * sat.model.radiusearthkm for sat in satellites])
+    apogee = np.array([sat.model.alta * sat.model.radiusearthkm for sat in satellites])
+    return perigee, apogee
+
+def neighbour_pairs(points, cell_km):
+    # spatial hash: every pair (i < j) whose cells touch, packed as i * n + j.
+    # the keys are sorted once and each of the 27 neighbour cells is a searchsorted
+    n = len(points)
+    valid = np.isfinite(points).all(axis=1)
+    if not valid.any():
+        return np.empty(0, dtype=np.int64)
+    cells = np.zeros((n, 3), dtype=np.int64)
+    cells[valid] = np.floor(points[valid] / cell_km).astype(np.int64)
+    cells -= cells[valid].min(axis=0) - 1 # leave room for the -1 offset
+    span = cells[valid].max(axis=0) + 2
+
+    def cell_key(c):
+        return (c[..., 0] * span[1] + c[..., 1]) * span[2] + c[..., 2]
+
+    keys = np.where(valid, cell_key(cells), -1)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    found = []
+    for offset in NEIGHBOUR_OFFSETS:
+        neighbour = np.where(valid, cell_key(cells + offset), -2)
+        left = np.searchsorted(sorted_keys, neighbour, 'left')
+        counts = np.searchsorted(sorted_keys, neighbour, 'right') - left
+        total = counts.sum()
+        if total == 0:
+            continue
+        # expand each (left, count) run into individual indices without a python loop
+        src = np.repeat(np.arange(n), counts)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        dst = order[np.arange(total) - run_start + np.repeat(left, counts)]
+        keep = src < dst
+        found.append(src[keep] * n + dst[keep])
+    if not found:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(found))
+
+def propagate(sat_array, jd, fraction):
+    # TEME positions and velocities (n, m, 3) in km and km/s; distances between objects don't care about the frame
+    errors, r, v = sat_array.sgp4(jd, fraction)
+    r[errors != 0] = np.nan
+    v[errors != 0] = np.nan
+    return r, v
+
+def linear_approach(r, v, max_s):
+    # closest approach of straight-line relative motion within +-max_s seconds: (tau, miss_km)
+    speed_sq = np.maximum((v * v).sum(axis=-1), 1e-12)
+    tau = np.clip(-(r * v).sum(axis=-1) / speed_sq, -max_s, max_s)
+    return tau, np.linalg.norm(r + v * tau[..., None], axis=-1)
+
+def hermite_minimum(p0, v0, p1, v1, h, iterations=8):
+    # closest approach between two samples h seconds apart, relative motion as a cubic hermite
+    # through positions and velocities at both ends. newton on the range rate, vectorized over pairs.
+    # returns (s in [0, 1], miss_km)
+    a, b = p0, h * v0
+    c = -3 * p0 - 2 * h * v0 + 3 * p1 - h * v1
+    d = 2 * p0 + h * v0 - 2 * p1 + h * v1
+
+    def at(s):
+        s = s[:, None]
+        pos = a + s * (b + s * (c + s * d))
+        vel = b + s * (2 * c + 3 * s * d)
+        acc = 2 * c + 6 * s * d
+        return pos, vel, acc
+
+    s = np.clip(linear_approach(p0, b, 1.0)[0], 0.0, 1.0)
+    for _ in range(iterations):
+        pos, vel, acc = at(s)
+        rate = (pos * vel).sum(axis=1)
+        slope = (vel * vel).sum(axis=1) + (pos * acc).sum(axis=1)
+        step = np.where(slope > 0, rate / np.where(slope > 0, slope, 1.0), 0.0)
+        s = np.clip(s - step, 0.0, 1.0)
+    # the ends of the interval can still be closer (no interior minimum)
+    candidates = np.stack([s, np.zeros_like(s), np.ones_like(s)])
+    miss = np.stack([np.linalg.norm(at(x)[0], axis=1) for x in candidates])
+    best = np.argmin(np.where(np.isnan(miss), np.inf, miss), axis=0)
+    columns = np.arange(len(s))
+    return candidates[best, columns], miss[best, columns]
+
+def screen_conjunctions(satellites, ts, t0, hours=24.0, step_s=60.0, threshold_km=20.0):
+    # close approaches between any two satellites over the next `hours`.
+    # returns a list of dicts sorted by miss distance; 'a'/'b' are indices into satellites
+    n = len(satellites)
+    if n < 2:
+        return []
+
+    ## apogee/perigee filter: two shells that never overlap can never meet.
+    ## the shells come from mean elements, hence the margin
+    perigee, apogee = orbit_shells(satellites)
+
+    ## coarse grid, bucketed by a spatial hash at every step
+    steps = int(hours * 3600 / step_s) + 1
+    times = ts.tt_jd(t0.tt + np.arange(steps) * step_s / DAY_S)
+    jd, fraction = sgp4_epoch(times)
+    sat_array = SatrecArray([sat.model for sat in satellites])
+    # anything that could close to threshold_km before the next sample
+    pad_km = threshold_km + MAX_RELATIVE_SPEED * step_s / 2
+    found_codes, found_steps, found_miss = [], [], []
+    for k in range(steps):
+        # one step at a time, so memory stays flat with 10k objects over a day
+        r, v = propagate(sat_array, jd[k:k + 1], fraction[k:k + 1])
+        r, v = r[:, 0, :], v[:, 0, :]
+        codes = neighbour_pairs(r, pad_km)
+        a, b = codes // n, codes % n
+        keep = np.maximum(perigee[a], perigee[b]) - np.minimum(apogee[a], apogee[b]) <= threshold_km + SHELL_MARGIN_KM
+        a, b, codes = a[keep], b[keep], codes[keep]
+        dr, dv = r[b] - r[a], v[b] - v[a]
+        dist = np.linalg.norm(dr, axis=1)
+        near = dist <= pad_km
+        codes, dr, dv, dist = codes[near], dr[near], dv[near], dist[near]
+        ## straight-line estimate over the neighbouring samples, minus how far
+        ## gravity can bend the relative path in that time
+        _, miss = linear_approach(dr, dv, step_s)
+        spread = dist + np.linalg.norm(dv, axis=1) * step_s
+        bend = 0.5 * MAX_TIDAL_ACCEL * spread * step_s**2
+        hit = miss - bend <= threshold_km
+        found_codes.append(codes[hit])
+        found_steps.append(np.full(hit.sum(), k))
+        found_miss.append(miss[hit])
+    codes = np.concatenate(found_codes)
+    if len(codes) == 0:
+        return []
+    steps_hit = np.concatenate(found_steps)
+    miss = np.concatenate(found_miss)
+
+    ## best sample of every pass (run of consecutive steps) per pair
+    order = np.lexsort((steps_hit, codes))
+    codes, steps_hit, miss = codes[order], steps_hit[order], miss[order]
+    new_pass = np.ones(len(codes), dtype=bool)
+    new_pass[1:] = (codes[1:] != codes[:-1]) | (steps_hit[1:] != steps_hit[:-1] + 1)
+    pass_id = np.cumsum(new_pass) - 1
+    by_pass = np.lexsort((miss, pass_id))
+    first = np.ones(len(by_pass), dtype=bool)
+    first[1:] = pass_id[by_pass][1:] != pass_id[by_pass][:-1]
+    codes, steps_hit = codes[by_pass[first]], steps_hit[by_pass[first]]
+    pair_a, pair_b = codes // n, codes % n
+
+    ## states of the surviving satellites on both sides of each best sample,
+    ## all of them in one SGP4 call per batch of sample times
+    involved = np.unique(np.concatenate([pair_a, pair_b]))
+    row = np.full(n, -1)
+    row[involved] = np.arange(len(involved))
+    near_steps = np.unique(np.clip(np.concatenate([steps_hit - 1, steps_hit, steps_hit + 1]), 0, steps - 1))
+    column = np.full(steps, -1)
+    column[near_steps] = np.arange(len(near_steps))
+    involved_array = SatrecArray([satellites[i].model for i in involved])
+    r = np.empty((len(involved), len(near_steps), 3))
+    v = np.empty_like(r)
+    for start in range(0, len(near_steps), REFINE_BATCH):
+        batch = near_steps[start:start + REFINE_BATCH]
+        r[:, start:start + len(batch)], v[:, start:start + len(batch)] = propagate(involved_array, jd[batch], fraction[batch])
+
+    def relative(k):
+        c = column[k]
+        return r[row[pair_b], c] - r[row[pair_a], c], v[row[pair_b], c] - v[row[pair_a], c]
+
+    ## time of closest approach on the interval before and after the sample, keep the closer one
+    tca, best_miss = np.full(len(codes), np.nan), np.full(len(codes), np.inf)
+    for k0, k1 in ((steps_hit - 1, steps_hit), (steps_hit, steps_hit + 1)):
+        inside = (k0 >= 0) & (k1 < steps)
+        k0, k1 = np.clip(k0, 0, steps - 1), np.clip(k1, 0, steps - 1)
+        p0, v0 = relative(k0)
+        p1, v1 = relative(k1)
+        s, m = hermite_minimum(p0, v0, p1, v1, step_s)
+        better = inside & (m < best_miss)
+        tca[better] = times.tt[k0[better]] + s[better] * step_s / DAY_S
+        best_miss[better] = m[better]
+
+    ## closest approach per pair under the threshold
+    closest = {}
+    for code, i, j, t, m in zip(codes, pair_a, pair_b, tca, best_miss):
+        if m <= threshold_km and (code not in closest or m < closest[code]['miss_km']):
+            closest[code] = {
+                'a': int(i), 'b': int(j),
+                'a_name': satellites[i].name, 'b_name': satellites[j].name,
+                'a_satnum': satellites[i].model.satnum, 'b_satnum': satellites[j].model.satnum,
+                'tca': ts.tt_jd(t), 'miss_km': float(m),
+            }
+    results = list(closest.values())
+    results.sort(key=lambda c: c['miss_km'])
+    return results
+
+class ConjunctionScreener(threading.Thread):
+    # runs the screening once in the background so the sky view stays live
+    def __init__(self, satellites, ts, hours=24.0, threshold_km=20.0):
+        super().__init__()
+        self.daemon = True
+        self.satellites = list(satellites)
+        self.ts = ts
+        self.hours = hours
+        self.threshold_km = threshold_km
+        self.results = None # None until finished
+        self.error = None
+
+    def run(self):
+        try:
+            self.results = screen_conjunctions(self.satellites, self.ts, self.ts.now(),
+                                               self.hours, threshold_km=self.threshold_km)
+        except Exception as e:
+            self.error = str(e)
+            self.results = []
+
+    def is_done(self):
+        return self.results is not None
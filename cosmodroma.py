@@ -6,17 +6,24 @@ import math
 import curses
 import time
 import numpy as np
-import datetime
 from zoneinfo import ZoneInfo
-from skyfield import almanac
 from skyfield.api import Star, load, wgs84
+from skyfield.constants import AU_KM
 from skyfield.data import hipparcos
-from skyfield.projections import build_stereographic_projection
 from skyfield.sgp4lib import EarthSatellite
 # internal modules
-from renderer import s_addch, start_menu, draw_circle, draw_satellite, LOCATIONS
+from renderer import s_addch, start_menu, draw_circle, draw_satellite, build_body_styles, display_almanac, LOCATIONS
+from renderer import draw_circle_braille, draw_braille, stars_bitmap, display_forecast
 from data_loader import load_data
-from satellite_map import display_map
+from sky_context import FrameContext
+from sky_engine import SkyEngine, screen_projection
+from visibility import SatelliteVisibility
+from satellite_map import display_map, display_conjunctions
+from conjunctions import ConjunctionScreener
+from almanac_tables import load_almanac, next_events, twilight_now
+from ephemeris_tables import find_table
+from target_search import build_target_index, star_label
+from forecast import load_forecast
 from iss_telemetry import ISSTelemetryStreamer
 
 def normalize_angle(degrees):
@@ -35,6 +42,8 @@ def main(stdscr):
     deepzoom_fov = 0.041 # fov required for focus
     focused_body = "Sun" # body we focus on
     display_mode = 0
+    visible_only = False # hide satellites that can't be seen with the naked eye
+    braille_mode = False # 2x4 dots per cell for stars and planet discs
     
     # colours
     if curses.has_colors():
@@ -51,6 +60,7 @@ def main(stdscr):
     if not selected_city:
         return
     city_data = LOCATIONS[selected_city]
+    current_tz = ZoneInfo(city_data['tz'])
 
     # start monitoring the ISS
     telemetry_thread = ISSTelemetryStreamer()
@@ -68,116 +78,117 @@ def main(stdscr):
     stdscr.refresh()
 
     # load data
-    ts, planets, observer, topos_observer, bodies, stars = load_data(stdscr, h, w, city_data['lat'], city_data['lon'])
+    ts, planets, observer, topos_observer, bodies, stars, sat_catalog, star_table = load_data(stdscr, h, w, city_data['lat'], city_data['lon'])
     planets_list = list(bodies.keys())
+    star_magnitudes = star_table["magnitude"].to_numpy()
+    body_styles = build_body_styles(bodies)
+    sat_visibility = SatelliteVisibility([name for name in bodies if body_styles[name]['is_satellite']])
+    engine = SkyEngine(ts, planets, observer, topos_observer, bodies, stars)
+    # close approach screening only makes sense past our handful of named satellites
+    screener = None
+    if len(sat_catalog) > 4:
+        screener = ConjunctionScreener(sat_catalog, ts)
+        screener.start()
+
+    # almanac for the week (cached on disk per site and date)
+    stdscr.clear()
+    stdscr.addstr(h//2, w//2 - 29, "computing almanac...")
+    stdscr.refresh()
+    solar_system = [name for name in bodies if not body_styles[name]['is_satellite']]
+    almanac_table = load_almanac(engine, solar_system, city_data, current_tz)
+    # search index for the 'e' prompt (planets, satellite catalog, stars)
+    target_index = build_target_index(bodies, sat_catalog, star_table)
+    # precomputed ephemeris tables (see ephemeris_tables.py), if any cover this session
+    engine.table = find_table(city_data, ts.now())
     drawn_labels = {} 
     min_distance_sq = float('inf')
     closest_body_in_view = None
     while True:
         stdscr.clear()
         h, w = stdscr.getmaxyx()
-        t = ts.now()
+        ctx = FrameContext(engine, current_tz)
+        t = ctx.t
+        pos = ctx.positions() # every body, one batch query
         is_locked = (fov <= deepzoom_fov and focused_body in bodies) # if locked in...
         ## update camera on our focused body if fov is locked in
         if is_locked:
-            body_to_focus = bodies[focused_body]
-            if isinstance(body_to_focus, EarthSatellite):
-                # EarthSatellite (TLEs)
-                topocentric = (body_to_focus - topos_observer).at(t)
-                center_az, center_alt, _ = topocentric.altaz()
-                center_position = observer.at(t).from_altaz(alt_degrees=center_alt.degrees, az_degrees=center_az.degrees)
-            else:
-                # planets (JPL Ephemeris)
-                target_body = observer.at(t).observe(body_to_focus)
-                center_position = target_body.apparent()
-                center_az, center_alt, _ = center_position.altaz()          
-            azimuth = center_az.degrees
-            raw_alt = center_alt.degrees
-            alt = max(-90.0, min(90.0, raw_alt))
+            i = pos['index'][focused_body]
+            center = pos['xyz'][i]
+            azimuth = pos['az'][i]
+            alt = max(-90.0, min(90.0, pos['alt'][i]))
         else:
             # just move it yourself
-            center_position = observer.at(t).from_altaz(alt_degrees=alt, az_degrees=azimuth)
+            center = engine.look_direction(t, alt, azimuth)
 
-        ## build the camera view from that center
-        projection = build_stereographic_projection(center_position)
+        ## project everything from that center
+        sx_all, sy_all, r2_all = screen_projection(np.moveaxis(pos['xyz'], 1, 0), center, fov, h, w)
 
         ## draw stars
         if fov > deepzoom_fov * 2:
-            astrometric = observer.at(t).observe(stars)
-            x_stars, y_stars = projection(astrometric)
-            limit = (fov/2 * 2)**2
-            for i in range(len(x_stars)):
-                if x_stars[i]**2 + y_stars[i]**2 > limit: continue
-                # coordinates relative to the screen
-                sx = (x_stars[i] / (fov/2) + 1) * (w / 2)
-                sy = (-y_stars[i] / (fov/2) + 1) * (h / 2)
-                s_addch(stdscr, sy, sx, '.', curses.color_pair(2))
+            sx_stars, sy_stars, r2_stars = screen_projection(engine.star_directions(t), center, fov, h, w)
+            in_view = r2_stars <= (fov/2 * 2)**2
+            if braille_mode:
+                # whole star field rasterized into one dot bitmap
+                bitmap = stars_bitmap(sx_stars[in_view], sy_stars[in_view], star_magnitudes[in_view], h, w)
+                draw_braille(stdscr, bitmap, curses.color_pair(2))
+            else:
+                for sx, sy in zip(sx_stars[in_view], sy_stars[in_view]):
+                    s_addch(stdscr, sy, sx, '.', curses.color_pair(2))
+
+        ## satellite visibility (from the same batch)
+        sat_visibility.update(engine, t, pos)
 
         ## draw celestial bodies
         body_data = {}
         drawn_labels = {} # reset
         for name, body in bodies.items():
-            current_dist = None
-            if isinstance(body, EarthSatellite):
-                # observation for satellites
-                topocentric = (body - topos_observer).at(t)
-                az_ang, alt_ang, current_dist = topocentric.altaz()
-                astrometric = observer.at(t).from_altaz(alt_degrees=alt_ang.degrees, az_degrees=az_ang.degrees)
-            else:
-                # observation for planets and stars
-                observation = observer.at(t).observe(body)
-                astrometric = observation.apparent()
-                current_dist = observation.distance()  
-            x_body, y_body = projection(astrometric)
+            i = pos['index'][name]
+            style = body_styles[name]
+            is_satellite = style['is_satellite']
+            is_focus = (name == focused_body and fov <= deepzoom_fov)
+            # drop invisible satellites before labelling them
+            if is_satellite and visible_only and not is_focus and not sat_visibility.is_visible(name):
+                continue
+            if not np.isfinite(pos['distance_km'][i]):
+                continue # decayed satellite
             # coords relative to the screen
-            sx = (x_body / (fov/2) + 1) * (w / 2)
-            sy = (-y_body / (fov/2) + 1) * (h / 2)
-            distance_sq = x_body**2 + y_body**2
+            sx, sy = sx_all[i], sy_all[i]
+            distance_sq = r2_all[i]
             if distance_sq < min_distance_sq:
                 min_distance_sq = distance_sq
                 closest_body_in_view = name
 
-            # colors per planet
-            has_rings = (name in ["Saturn", "Uranus", "Neptune"]) # hehe
-            color_attr = curses.color_pair(1)
-            if name == "Mars": color_attr = curses.color_pair(3)
-            elif name == "Sun": color_attr = curses.color_pair(4) | curses.A_BOLD 
-            elif name == "Jupiter": color_attr = curses.color_pair(4) 
-            elif name == "Venus": color_attr = curses.color_pair(5) 
-            elif name == "Moon": color_attr = curses.color_pair(1)
-            elif name == "Saturn": 
-                color_attr = curses.color_pair(4) 
-                ring_attr = curses.color_pair(6) | curses.A_BOLD # ring
-            elif name == "Uranus":
-                color_attr = curses.color_pair(2)
-                ring_attr = curses.color_pair(1)
-            elif name == "Neptune":
-                color_attr = curses.color_pair(7)
-                ring_attr = curses.color_pair(1)
-            elif isinstance(body, EarthSatellite):
-                color_attr = curses.color_pair(8) | curses.A_BOLD
+            # colors per planet (from the static style table)
+            color_attr = style['color']
             illum_val = 1.0
-            if name == "Moon":
-                # moon phase
-                illum_val = almanac.fraction_illuminated(planets, 'moon', t)
+            if name == "Moon" and is_focus:
+                # moon phase, only the disc and the info panel use it
+                illum_val = ctx.moon_illumination()
  
             # draw focused body if in deep zoom
-            if name == focused_body and fov <= deepzoom_fov:
-                if isinstance(body, EarthSatellite):
+            if is_focus:
+                if is_satellite:
                     draw_satellite(stdscr, name, sy, sx, color_attr)
+                elif braille_mode:
+                    draw_circle_braille(stdscr, sy, sx, preview_radius, illum_val,
+                                        color_attr, style['has_rings'], style['ring'])
                 else:
-                    true_and_real_ring_attr = ring_attr if has_rings else None
-                    draw_circle(stdscr, sy, sx, preview_radius, scale, float(illum_val), 
-                                color_attr, has_rings, true_and_real_ring_attr)
-                if isinstance(body, EarthSatellite):
-                    dist_str = f"{(current_dist.km):.1f} km"
+                    draw_circle(stdscr, sy, sx, preview_radius, scale, illum_val, 
+                                color_attr, style['has_rings'], style['ring'])
+                if is_satellite:
+                    dist_str = f"{pos['distance_km'][i]:.1f} km"
                 else:
-                    dist_str = f"{(current_dist.au):.5f} AU"
-                ra, dec, _ = astrometric.radec()
+                    dist_str = f"{pos['distance_km'][i] / AU_KM:.5f} AU"
+                ra, dec = pos['ra'][i], pos['dec'][i]
                 extras = {}
                 if name == "ISS":
                     extras = telemetry_thread.get_data()
-                body_data = { 'name': name, 'dist': dist_str, 'illum': illum_val, 'ra': ra, 'dec': dec, 'extras': extras }
+                if is_satellite:
+                    j = sat_visibility.index[name]
+                    lit = "sunlit" if sat_visibility.sunlit[j] else "in shadow"
+                    extras = {"Mag": f"{sat_visibility.magnitude[j]:.1f} ({lit})", **extras}
+                events = {} if is_satellite else next_events(almanac_table, name, ctx.local_time)
+                body_data = { 'name': name, 'dist': dist_str, 'illum': illum_val, 'ra': ra, 'dec': dec, 'extras': extras, 'events': events }
             else:
                 ## draw labels
                 # add real estate, only one can occupy a pixel
@@ -189,7 +200,7 @@ def main(stdscr):
                             is_occupied = True
                  # don't show satelites since they dont exist in relation to the moon but rather the sun
                 if not is_occupied:
-                    if isinstance(body, EarthSatellite) and fov > 5.0: 
+                    if is_satellite and fov > 5.0: 
                         if display_mode == 1:
                             continue
                         s_addch(stdscr, sy, sx, '✜', color_attr)
@@ -200,8 +211,8 @@ def main(stdscr):
                         s_addch(stdscr, sy, sx, '●', curses.A_BOLD | color_attr)
                     else:
                         # zoomed shows name
-                        if isinstance(body, EarthSatellite) and display_mode == 1: continue
-                        if not isinstance(body, EarthSatellite) and display_mode == 2: continue
+                        if is_satellite and display_mode == 1: continue
+                        if not is_satellite and display_mode == 2: continue
                         if 0 <= sy < h and 0 <= sx < w - len(name):
                             try: stdscr.addstr(int(sy), int(sx), name, curses.A_BOLD | color_attr)
                             except: pass
@@ -215,9 +226,12 @@ def main(stdscr):
                 f"--- {body_data['name']}{horizon_msg} ---",
                 f"Dist: {body_data['dist']}",
                 *([f"Phase: {body_data['illum']*100:.1f}%"] if body_data['name'] == 'Moon' else []),
-                f"RA: {body_data['ra'].hours:.2f}h",
-                f"Dec: {body_data['dec'].degrees:.2f}"
+                f"RA: {body_data['ra']:.2f}h",
+                f"Dec: {body_data['dec']:.2f}"
             ]
+            for kind, when in body_data['events'].items():
+                when_str = when.astimezone(current_tz).strftime('%a %Hh%M') if when else "--"
+                lines.append(f"Next {kind}: {when_str}")
             if body_data.get('extras'):
                 for k, v in body_data['extras'].items():
                     lines.append(f"{k}: {v}")
@@ -227,15 +241,13 @@ def main(stdscr):
                     except: pass
 
         ### status bar
-        status = f"Az:{azimuth:.1f} Alt:{alt:.1f} Zoom:{fov:.3f} | 'w/s' zoom, 'e' target, 'p/o/d' filter, 'm' map view, 'q' quit"
+        status = f"Az:{azimuth:.1f} Alt:{alt:.1f} Zoom:{fov:.3f} | 'w/s' zoom, 'e' target, 'p/o/d' filter, 'v' visible only, 'm' map view, 'c' close approaches, 'a' almanac, 'f' forecast, 'b' braille, 'q' quit"
         status_focus = f"'s' unzoom, 'left/right' showcase planets, 'e' change target"
         try: stdscr.addstr(0, 0, status_focus[:w-1] if is_locked else status[:w-1], curses.A_REVERSE)
         except: pass
 
         ### time
-        current_tz = ZoneInfo(city_data['tz'])
-        now = datetime.datetime.now(current_tz)
-        time_str = f"{selected_city} ; {now.strftime('%Hh%M')}"
+        time_str = f"{selected_city} ; {ctx.local_time.strftime('%Hh%M')} ; {twilight_now(almanac_table, ctx.local_time)}"
         try: stdscr.addstr(h-1, w - len(time_str) - 1, time_str, curses.color_pair(1))
         except: pass
 
@@ -247,63 +259,95 @@ def main(stdscr):
             display_mode = 2 # satellites only
         if key == ord('d'):
             display_mode = 0 # default (everything)
+        if key == ord('v'):
+            visible_only = not visible_only
+        if key == ord('b'):
+            braille_mode = not braille_mode
         if key == ord('m'): # map viexw
-            if focused_body in bodies and isinstance(bodies[focused_body], EarthSatellite):
-                display_map(stdscr, bodies[focused_body], ts)
+            if focused_body in bodies and body_styles[focused_body]['is_satellite']:
+                display_map(stdscr, bodies[focused_body], engine)
             else:
                 all_sats = [obj for obj in bodies.values() if isinstance(obj, EarthSatellite)]
-                display_map(stdscr, all_sats, ts)
+                flagged = screener.results if screener and screener.is_done() else None
+                display_map(stdscr, all_sats, engine, flagged)
+            continue
+        if key == ord('f'): # forecast screen
+            star_labels = [star_label(hip) for hip in star_table.index]
+            load_year = lambda year: load_forecast(ts, city_data, year, star_table, star_labels)
+            display_forecast(stdscr, load_year, current_tz, selected_city, ctx.local_time.year)
+            continue
+        if key == ord('a'): # almanac screen
+            display_almanac(stdscr, almanac_table, current_tz, selected_city)
+            continue
+        if key == ord('c') and screener: # close approaches
+            display_conjunctions(stdscr, screener, engine, current_tz)
             continue
         if key == ord('q'): break
         if key == ord('e'):
             curses.curs_set(1)
             prompt = "Target: "
-            # add prompt
-            stdscr.attron(curses.color_pair(1) | curses.A_REVERSE)
-            stdscr.addstr(h//2, w//2 - 15, " " * 30) 
-            stdscr.addstr(h//2, w//2 - 13, prompt)
-            stdscr.attroff(curses.A_REVERSE)
-            
+            box_w = 44
             # capture inputs
             stdscr.nodelay(0) 
             input_str = ""
+            suggestions = []
+            selected = 0
             while True:
+                # redraw prompt and live suggestions
+                stdscr.attron(curses.color_pair(1) | curses.A_REVERSE)
+                stdscr.addstr(h//2, w//2 - box_w//2, " " * box_w) # clear line
+                stdscr.addstr(h//2, w//2 - box_w//2 + 2, prompt + input_str)
+                stdscr.attroff(curses.A_REVERSE)
+                for i in range(6):
+                    line = ""
+                    if i < len(suggestions):
+                        label, kind, _ = suggestions[i]
+                        line = f" {label} ({kind if kind != 'body' else 'tracked'})"
+                    attr = curses.A_REVERSE if i == selected and suggestions else 0
+                    try: stdscr.addstr(h//2 + 1 + i, w//2 - box_w//2, line[:box_w].ljust(box_w), attr)
+                    except: pass
+
                 char_code = stdscr.getch()
-                
                 # enter
                 if char_code in [10, 13]:
                     break
                 # escape
                 elif char_code == 27:
-                    input_str = ""
+                    suggestions = []
                     break
+                elif char_code == curses.KEY_UP:
+                    selected = max(0, selected - 1)
+                    continue
+                elif char_code == curses.KEY_DOWN:
+                    selected = min(max(0, len(suggestions) - 1), selected + 1)
+                    continue
                 # backspace (unix and windows)
                 elif char_code in [8, 127, curses.KEY_BACKSPACE]:
                     if len(input_str) > 0:
                         input_str = input_str[:-1]
                 # printable characters
                 elif 32 <= char_code <= 126:
-                    if len(input_str) < 15: # len limit
+                    if len(input_str) < box_w - len(prompt) - 4: # len limit
                         input_str += chr(char_code)
-                
-                # redraw
-                stdscr.attron(curses.color_pair(1) | curses.A_REVERSE)
-                stdscr.addstr(h//2, w//2 - 15, " " * 30) # clear line
-                stdscr.addstr(h//2, w//2 - 13, prompt + input_str)
-                stdscr.attroff(curses.A_REVERSE)
+                suggestions = target_index.search(input_str, 6)
+                selected = 0
             
             stdscr.nodelay(1) 
             curses.curs_set(0)
             
-            target_name = input_str.strip().title()
-            # handle special casing
-            if target_name.upper() == "CSS" or "tian" in target_name.lower() or "chinese" in target_name.lower() : target_name = "Tiangong"
-            if target_name.upper() == "ISS" or "international" in target_name.lower(): target_name = "ISS"
-            if target_name.upper() == "HST" or "hubble" in target_name.lower(): target_name = "Hubble"
-            if target_name.upper() == "COPERNICUS": target_name = "Copernicus"
-            if target_name in bodies:
+            if suggestions:
+                label, kind, ref = suggestions[selected]
+                if kind != "body" and label not in bodies:
+                    # catalog satellite or star: start tracking it like the other bodies
+                    if kind == "satellite":
+                        bodies[label] = ref
+                    else:
+                        bodies[label] = Star.from_dataframe(star_table.loc[ref])
+                    planets_list.append(label)
+                    body_styles = build_body_styles(bodies)
+                    sat_visibility = SatelliteVisibility([name for name in bodies if body_styles[name]['is_satellite']])
                 is_locked = True
-                focused_body = target_name
+                focused_body = ref if kind == "body" else label
                 fov = deepzoom_fov
             
             continue
@@ -1,6 +1,17 @@
 from skyfield.api import Star, load, wgs84
 from skyfield.data import hipparcos
 
+CACHE_DIR = "cosmodroma_cache" # precomputed tables, next to the downloaded data files
+
+def solar_system_bodies(planets):
+    # display name -> ephemeris segment
+    return { "Mars": planets["mars"], "Venus": planets["venus"],
+             "Jupiter": planets["jupiter barycenter"], 
+             "Saturn": planets["saturn barycenter"],
+             "Uranus": planets["uranus barycenter"],
+             "Neptune": planets["neptune barycenter"],
+             "Moon": planets["moon"], "Sun": planets["sun"]}
+
 def load_data(stdscr, h, w, lat=40.7128, long=-74.0060):
     ### load data
     ## jpl ephemeris
@@ -16,6 +27,7 @@ def load_data(stdscr, h, w, lat=40.7128, long=-74.0060):
     stdscr.refresh()
     sat_file = load.tle_file('https://celestrak.org/NORAD/elements/gp.php?GROUP=visual&FORMAT=tle')
     satellites = {}
+    sat_catalog = list(sat_file) # everything in the group, for screening
     
     # filter selected satellites :)
     for sat in sat_file:
@@ -30,12 +42,7 @@ def load_data(stdscr, h, w, lat=40.7128, long=-74.0060):
             satellites["Copernicus"] = sat
 
     ## planetary data
-    bodies = { "Mars": planets["mars"], "Venus": planets["venus"],
-               "Jupiter": planets["jupiter barycenter"], 
-               "Saturn": planets["saturn barycenter"],
-               "Uranus": planets["uranus barycenter"],
-               "Neptune": planets["neptune barycenter"],
-               "Moon": planets["moon"], "Sun": planets["sun"]}
+    bodies = solar_system_bodies(planets)
     bodies.update(satellites)
 
     ## star data
@@ -47,4 +54,4 @@ def load_data(stdscr, h, w, lat=40.7128, long=-74.0060):
         df = hipparcos.load_dataframe(f)
     bright_stars = df[df["magnitude"] <= 3.5]
     stars = Star.from_dataframe(bright_stars)
-    return ts, planets, observer, topos_observer, bodies, stars 
\ No newline at end of file
+    return ts, planets, observer, topos_observer, bodies, stars, sat_catalog, bright_stars 
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+precomputed ephemeris tables
+
+usage: python ephemeris_tables.py "Paranal, Chile" --days 30 --step 1
+
+apparent alt/az, RA/Dec and distance for every solar system body at a site are
+written to a .npy file (plus a small .json header) in the cache directory.
+sessions open them memory-mapped, so any number of processes share one copy
+and nothing has to evaluate the DE421 polynomials again.
+"""
+
+import os
+import json
+import glob
+import argparse
+import datetime
+import numpy as np
+from zoneinfo import ZoneInfo
+from skyfield.api import load, wgs84
+from skyfield.constants import AU_KM
+from data_loader import CACHE_DIR, solar_system_bodies
+from sky_engine import SkyEngine
+
+COLUMNS = ["alt", "az", "ra", "dec", "dist"] # degrees, degrees, hours, degrees (ICRS axes), AU
+FORMAT = 2 # bump when the columns change; 1 (no field) had RA/Dec of date
+WRAP = {"az": 360.0, "ra": 24.0} # columns that roll over
+
+def _site_prefix(city_data):
+    return os.path.join(CACHE_DIR, f"ephem_{city_data['lat']:.4f}_{city_data['lon']:.4f}_")
+
+def build_tables(engine, city_data, start, days, step_minutes=1.0):
+    # one batch query over the whole time grid, a day at a time
+    ts = engine.ts
+    names = list(engine.bodies.keys())
+    steps = int(days * 24 * 60 / step_minutes) + 1
+    t0 = ts.from_datetime(start)
+    step_days = step_minutes / (24 * 60)
+    per_day = int(24 * 60 / step_minutes) + 1
+
+    base = f"{_site_prefix(city_data)}{start.date().isoformat()}_{days}d_{step_minutes:g}m"
+    # temporary names carry the pid, so two processes building the same table don't share files
+    tmp_path = f"{base}.{os.getpid()}.tmp.npy"
+    tmp_header = f"{base}.{os.getpid()}.json.tmp"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64,
+                                      shape=(len(names), steps, len(COLUMNS)))
+    for k in range(0, steps, per_day):
+        times = ts.tt_jd(t0.tt + np.arange(k, min(k + per_day, steps)) * step_days)
+        pos = engine.positions(names, times)
+        table[:, k:k + len(times)] = np.stack([pos['alt'], pos['az'], pos['ra'], pos['dec'],
+                                               pos['distance_km'] / AU_KM], axis=-1)
+    table.flush()
+    del table
+
+    # header first, then rename the table into place, so readers never see half of one
+    header = {'format': FORMAT, 'bodies': names, 't0': float(t0.tt), 'step': step_days, 'steps': steps}
+    with open(tmp_header, "w") as f:
+        json.dump(header, f)
+    os.replace(tmp_header, base + ".json")
+    os.replace(tmp_path, base + ".npy")
+    return base + ".npy"
+
+class EphemerisTable:
+    # read-only, memory-mapped view of one precomputed table
+    def __init__(self, path):
+        with open(path[:-len(".npy")] + ".json") as f:
+            header = json.load(f)
+        if header.get('format') != FORMAT:
+            raise ValueError(f"{path}: table format {header.get('format', 1)}, expected {FORMAT}")
+        self.data = np.load(path, mmap_mode="r")
+        self.index = {name: i for i, name in enumerate(header['bodies'])}
+        self.t0 = header['t0']
+        self.step = header['step']
+        self.steps = header['steps']
+
+    def covers(self, t):
+        f = (t.tt - self.t0) / self.step
+        return 0 <= f <= self.steps - 1
+
+    def lookup(self, name, t):
+        # (alt, az, ra, dec, dist) linearly interpolated at t, None if out of range
+        i = self.index.get(name)
+        if i is None or not self.covers(t):
+            return None
+        f = (t.tt - self.t0) / self.step
+        k = min(int(f), self.steps - 2)
+        frac = f - k
+        a, b = np.asarray(self.data[i, k]), np.asarray(self.data[i, k + 1])
+        delta = b - a
+        for col, period in WRAP.items():
+            j = COLUMNS.index(col)
+            delta[j] = (delta[j] + period / 2) % period - period / 2
+        row = a + frac * delta
+        row[COLUMNS.index("az")] %= 360.0
+        row[COLUMNS.index("ra")] %= 24.0
+        return row
+
+def find_table(city_data, t):
+    # newest table for this site that covers t, or None
+    for path in sorted(glob.glob(_site_prefix(city_data) + "*.npy"), key=os.path.getmtime, reverse=True):
+        if path.endswith(".tmp.npy"):
+            continue
+        try:
+            table = EphemerisTable(path)
+        except (OSError, ValueError):
+            continue
+        if table.covers(t):
+            return table
+    return None
+
+if __name__ == "__main__":
+    from renderer import LOCATIONS
+    parser = argparse.ArgumentParser(description="precompute ephemeris tables for an observation site")
+    parser.add_argument("site", choices=list(LOCATIONS.keys()))
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--step", type=float, default=1.0, help="minutes between samples")
+    args = parser.parse_args()
+
+    city_data = LOCATIONS[args.site]
+    ts = load.timescale()
+    planets = load("de421.bsp")
+    topos_observer = wgs84.latlon(city_data['lat'], city_data['lon'])
+    observer = planets["earth"] + topos_observer
+    engine = SkyEngine(ts, planets, observer, topos_observer, solar_system_bodies(planets))
+    start = datetime.datetime.now(ZoneInfo(city_data['tz'])).replace(hour=0, minute=0, second=0, microsecond=0)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = build_tables(engine, city_data, start, args.days, args.step)
+    print(f"wrote {path}")
@@ -0,0 +1,210 @@
+import os
+import json
+import functools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from skyfield import almanac, eclipselib
+from skyfield.api import Star, load, wgs84
+from skyfield.searchlib import find_minima
+from data_loader import CACHE_DIR, solar_system_bodies
+from sky_engine import SkyEngine
+
+SUN_RADIUS_KM = 696000.0
+MOON_RADIUS_KM = 1737.4
+PLANET_CONJUNCTION_DEG = 3.0 # closest planet pairs worth listing
+MOON_CONJUNCTION_DEG = 5.0
+SCAN_STEP_HOURS = 1.0 # coarse grid; the Moon moves about half a degree per hour
+ECLIPSE_WINDOW_MIN = 180 # minutes either side of greatest eclipse, longer than any local eclipse lasts
+
+## everything below the pool boundary runs in worker processes, which load
+## their own ephemeris (skyfield kernels can't be pickled across processes)
+
+@functools.lru_cache(maxsize=None)
+def _sky(lat, lon):
+    # one SkyEngine per worker and site
+    ts = load.timescale()
+    planets = load("de421.bsp")
+    topos_observer = wgs84.latlon(lat, lon)
+    return SkyEngine(ts, planets, planets["earth"] + topos_observer, topos_observer, solar_system_bodies(planets))
+
+def _angle(u, v):
+    # degrees between unit vectors along axis 0
+    return np.degrees(np.arccos(np.clip((u * v).sum(axis=0), -1.0, 1.0)))
+
+def _separation(observer, a, b):
+    # separation in degrees as a function of time, ready for find_minima
+    def separation_at(t):
+        here = observer.at(t)
+        return here.observe(a).apparent().separation_from(here.observe(b).apparent()).degrees
+    separation_at.step_days = SCAN_STEP_HOURS / 24 / 4
+    return separation_at
+
+def _local_minima(sep, limit):
+    # indices of coarse samples that are local minima below limit
+    inner = (sep[1:-1] < sep[:-2]) & (sep[1:-1] <= sep[2:]) & (sep[1:-1] < limit)
+    return np.nonzero(inner)[0] + 1
+
+def _refine(times, k, f, t_start, t_end):
+    # precise minimum between the coarse neighbours of sample k, kept only inside this chunk
+    t_min, values = find_minima(times[k - 1], times[k + 1], f)
+    if len(values) == 0:
+        return None, None
+    best = int(np.argmin(values))
+    t = t_min[best]
+    if not (t_start.tt <= t.tt < t_end.tt):
+        return None, None
+    return t, float(values[best])
+
+def _grid(ts, t_start, t_end):
+    # one step of overlap on both sides so minima on chunk boundaries aren't lost
+    step = SCAN_STEP_HOURS / 24
+    return ts.tt_jd(np.arange(t_start.tt - step, t_end.tt + 2 * step, step))
+
+def _event(t, kind, title, detail):
+    return {'time': t.utc_iso(), 'kind': kind, 'title': title, 'detail': detail}
+
+def _conjunctions(lat, lon, jd_start, jd_end):
+    engine = _sky(lat, lon)
+    ts, bodies = engine.ts, engine.bodies
+    t_start, t_end = ts.tt_jd(jd_start), ts.tt_jd(jd_end)
+    names = [name for name in bodies if name != "Sun"]
+    times = _grid(ts, t_start, t_end)
+
+    ## coarse separations of every pair at every step, one batch query and one einsum
+    u = engine.positions(names, times)['xyz'] # (k, 3, m)
+    sep = np.degrees(np.arccos(np.clip(np.einsum('iam,jam->ijm', u, u), -1.0, 1.0)))
+
+    events = []
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            has_moon = "Moon" in (names[i], names[j])
+            limit = MOON_CONJUNCTION_DEG if has_moon else PLANET_CONJUNCTION_DEG
+            f = _separation(engine.observer, bodies[names[i]], bodies[names[j]])
+            for k in _local_minima(sep[i, j], limit):
+                t, value = _refine(times, k, f, t_start, t_end)
+                if t is not None and value < limit:
+                    events.append(_event(t, "conjunction", f"{names[i]} - {names[j]}", f"{value:.2f}° apart"))
+    return events
+
+def _occultations(lat, lon, jd_start, jd_end, star_ra, star_dec, star_names):
+    engine = _sky(lat, lon)
+    ts, moon = engine.ts, engine.bodies["Moon"]
+    t_start, t_end = ts.tt_jd(jd_start), ts.tt_jd(jd_end)
+    times = _grid(ts, t_start, t_end)
+
+    ## moon against every star at every step, one matrix product
+    u_moon = engine.positions(["Moon"], times)['xyz'][0] # (3, m)
+    stars = Star(ra_hours=star_ra, dec_degrees=star_dec)
+    xyz = engine.observer.at(ts.tt_jd((jd_start + jd_end) / 2)).observe(stars).xyz.au # stars barely move in a month
+    u_stars = xyz / np.linalg.norm(xyz, axis=0)
+    sep = np.degrees(np.arccos(np.clip(u_stars.T @ u_moon, -1.0, 1.0))) # (stars, m)
+
+    events = []
+    # moon radius plus one step of lunar motion
+    candidates = [(s, k) for s in range(len(star_names)) for k in _local_minima(sep[s], 1.0)]
+    for s, k in candidates:
+        star = Star(ra_hours=star_ra[s], dec_degrees=star_dec[s])
+        t, value = _refine(times, k, _separation(engine.observer, moon, star), t_start, t_end)
+        if t is None:
+            continue
+        position = engine.positions(["Moon"], t)
+        moon_radius = np.degrees(np.arcsin(MOON_RADIUS_KM / position['distance_km'][0]))
+        if value < moon_radius and position['alt'][0] > 0:
+            events.append(_event(t, "occultation", f"Moon occults {star_names[s]}", f"{value * 60:.1f}' from centre"))
+    return events
+
+def _solar_eclipses(lat, lon, jd_start, jd_end):
+    engine = _sky(lat, lon)
+    ts = engine.ts
+    t_start, t_end = ts.tt_jd(jd_start), ts.tt_jd(jd_end)
+    # only new moons can eclipse the sun
+    t_phase, phase = almanac.find_discrete(t_start, t_end, almanac.moon_phases(engine.planets))
+    events = []
+    f = _separation(engine.observer, engine.bodies["Sun"], engine.bodies["Moon"])
+    for t_new in t_phase[phase == 0]:
+        t_min, values = find_minima(ts.tt_jd(t_new.tt - 0.5), ts.tt_jd(t_new.tt + 0.5), f)
+        if len(values) == 0:
+            continue
+        t_peak = t_min[int(np.argmin(values))]
+        ## the whole eclipse around greatest eclipse, minute by minute: it may already
+        ## be under way at sunrise or still going at sunset
+        times = ts.tt_jd(t_peak.tt + np.arange(-ECLIPSE_WINDOW_MIN, ECLIPSE_WINDOW_MIN + 1) / (24 * 60))
+        pos = engine.positions(["Sun", "Moon"], times)
+        sep = _angle(pos['xyz'][0], pos['xyz'][1])
+        r_sun = np.degrees(np.arcsin(SUN_RADIUS_KM / pos['distance_km'][0]))
+        r_moon = np.degrees(np.arcsin(MOON_RADIUS_KM / pos['distance_km'][1]))
+        covered = (r_sun + r_moon - sep) / (2 * r_sun) # magnitude: fraction of the diameter covered
+        seen = (sep < r_sun + r_moon) & (pos['alt'][0] > 0)
+        if not seen.any():
+            continue
+        # deepest moment with the sun up
+        k = int(np.flatnonzero(seen)[np.argmax(covered[seen])])
+        if sep[k] <= r_moon[k] - r_sun[k]:
+            kind = "Total"
+        elif sep[k] <= r_sun[k] - r_moon[k]:
+            kind = "Annular"
+        else:
+            kind = "Partial"
+        peak = int(np.argmax(covered))
+        where = "" if seen[peak] else (", at sunrise" if k > peak else ", at sunset")
+        events.append(_event(times[k], "eclipse", f"{kind} solar eclipse", f"magnitude {covered[k]:.2f}{where}"))
+    return events
+
+def _lunar_eclipses(lat, lon, jd_start, jd_end):
+    engine = _sky(lat, lon)
+    ts = engine.ts
+    t, kinds, _ = eclipselib.lunar_eclipses(ts.tt_jd(jd_start), ts.tt_jd(jd_end), engine.planets)
+    if len(t) == 0:
+        return []
+    alt = engine.positions(["Moon"], t)['alt'][0]
+    events = []
+    for ti, kind, moon_alt in zip(t, kinds, alt):
+        where = "visible" if moon_alt > 0 else "moon below horizon"
+        events.append(_event(ti, "eclipse", f"{eclipselib.LUNAR_ECLIPSES[kind]} lunar eclipse", where))
+    return events
+
+def _run(task):
+    function, args = task
+    return function(*args)
+
+## main process side
+
+def _cache_path(city_data, year):
+    return os.path.join(CACHE_DIR, f"forecast_{city_data['lat']:.4f}_{city_data['lon']:.4f}_{year}.json")
+
+def compute_forecast(ts, city_data, year, star_table, star_labels, workers=None):
+    # whole year of events, split into monthly chunks across a process pool
+    lat, lon = city_data['lat'], city_data['lon']
+    months = [ts.utc(year, m, 1).tt for m in range(1, 14)]
+    jd_start, jd_end = months[0], months[-1]
+    star_ra = star_table["ra_hours"].to_numpy()
+    star_dec = star_table["dec_degrees"].to_numpy()
+    tasks = [(_solar_eclipses, (lat, lon, jd_start, jd_end)), (_lunar_eclipses, (lat, lon, jd_start, jd_end))]
+    for a, b in zip(months[:-1], months[1:]):
+        tasks.append((_conjunctions, (lat, lon, a, b)))
+        tasks.append((_occultations, (lat, lon, a, b, star_ra, star_dec, star_labels)))
+
+    # spawn, not fork: the caller has telemetry and screening threads running, and a forked
+    # child can inherit one of their locks held. workers load their own ephemeris anyway
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        events = [event for chunk in pool.map(_run, tasks) for event in chunk]
+    events.sort(key=lambda e: e['time'])
+    return events
+
+def load_forecast(ts, city_data, year, star_table, star_labels):
+    # cached per site and year
+    path = _cache_path(city_data, year)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    events = compute_forecast(ts, city_data, year, star_table, star_labels)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(events, f)
+    os.replace(tmp_path, path)
+    return events
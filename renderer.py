@@ -1,5 +1,9 @@
 import curses
 import math
+import datetime
+import numpy as np
+from skyfield.sgp4lib import EarthSatellite
+from almanac_tables import parse_time, TWILIGHT_NAMES
 
 iss_ascii = """
                              
@@ -53,6 +57,41 @@ LOCATIONS = {
     "Sutherland (SAAO)": {"lat": -32.3760, "lon": 20.8107, "tz": "Africa/Johannesburg"}
 }
 
+# colour pair, extra attributes and ring colour per named body
+PLANET_STYLES = {
+    "Sun": (4, curses.A_BOLD, None),
+    "Mars": (3, 0, None),
+    "Jupiter": (4, 0, None),
+    "Venus": (5, 0, None),
+    "Moon": (1, 0, None),
+    "Saturn": (4, 0, (6, curses.A_BOLD)),
+    "Uranus": (2, 0, (1, 0)),
+    "Neptune": (7, 0, (1, 0)),
+}
+
+def build_body_styles(bodies):
+    # static style table, built once when the catalog loads (colours must be started)
+    styles = {}
+    for name, body in bodies.items():
+        is_satellite = isinstance(body, EarthSatellite)
+        ring_attr = None
+        if name in PLANET_STYLES:
+            pair, extra, ring = PLANET_STYLES[name]
+            color_attr = curses.color_pair(pair) | extra
+            if ring is not None:
+                ring_attr = curses.color_pair(ring[0]) | ring[1]
+        elif is_satellite:
+            color_attr = curses.color_pair(8) | curses.A_BOLD
+        else:
+            color_attr = curses.color_pair(1)
+        styles[name] = {
+            'color': color_attr,
+            'ring': ring_attr,
+            'has_rings': ring_attr is not None,
+            'is_satellite': is_satellite,
+        }
+    return styles
+
 def s_addch(stdscr, y, x, char, attr=0): # safe character drawing
     h, w = stdscr.getmaxyx()
     if 0 <= y < h and 0 <= x < w: # only if it is within bounds.
@@ -163,6 +202,11 @@ def start_menu(stdscr):
                             "W/S: zoom in/out",
                             "E:   select body",
                             "M:   map view (satellites only)",
+                            "V:   visible satellites only",
+                            "C:   satellite close approaches",
+                            "A:   almanac (rise, transit, set, twilight)",
+                            "B:   braille high resolution mode",
+                            "F:   forecast (conjunctions, occultations, eclipses)",
                             "Arrows: move view / showcase"
                         ]
                         for i, line in enumerate(lines):
@@ -254,4 +298,192 @@ def draw_circle(stdscr, y, x, radius, charmap, illumination=1.0, color_attr=None
                 ring_dist = math.sqrt((dx/2.0)**2 + ring_y**2)
                 if radius * 1.4 < ring_dist < radius * 2.3:
                     final_ring_attr = ring_attr if ring_attr is not None else color_attr
-                    s_addch(stdscr, center_y + dy, center_x + dx, '-', final_ring_attr)
\ No newline at end of file
+                    s_addch(stdscr, center_y + dy, center_x + dx, '-', final_ring_attr)
+
+## braille (2x4 dots per cell) rendering
+# bit of every dot inside a cell, indexed [row][column] - https://en.wikipedia.org/wiki/Braille_Patterns
+BRAILLE_BITS = np.array([[0x01, 0x08], [0x02, 0x10], [0x04, 0x20], [0x40, 0x80]], dtype=np.int32)
+# ordered dithering threshold map for sphere shading
+BAYER_4X4 = np.array([[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]) / 16.0
+# dot patterns by star brightness: (max magnitude, offsets)
+STAR_PATTERNS = [
+    (0.5, [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]), # plus
+    (1.5, [(0, 0), (1, 0), (0, 1), (1, 1)]), # 2x2 block
+    (2.5, [(0, 0), (1, 0)]), # pair
+    (99.0, [(0, 0)]), # single dot
+]
+
+def braille_pack(bitmap):
+    # (4h, 2w) bool dot bitmap -> (h, w) array of braille codepoints, in one pass
+    rows, cols = bitmap.shape[0] // 4, bitmap.shape[1] // 2
+    cells = bitmap[:rows * 4, :cols * 2].reshape(rows, 4, cols, 2)
+    return 0x2800 + (cells * BRAILLE_BITS[None, :, None, :]).sum(axis=(1, 3))
+
+def draw_braille(stdscr, bitmap, attr, origin_y=0, origin_x=0):
+    # only non-empty cells are drawn so the rest of the frame shows through
+    codes = braille_pack(bitmap)
+    for cy, cx in zip(*np.nonzero(codes != 0x2800)):
+        s_addch(stdscr, origin_y + cy, origin_x + cx, chr(codes[cy, cx]), attr)
+
+def stars_bitmap(sx, sy, magnitudes, h, w):
+    # screen (cell) coordinates -> dot bitmap for the whole screen, brighter stars get more dots
+    bitmap = np.zeros((h * 4, w * 2), dtype=bool)
+    dot_x = np.floor(np.asarray(sx) * 2).astype(int)
+    dot_y = np.floor(np.asarray(sy) * 4).astype(int)
+    magnitudes = np.asarray(magnitudes)
+    lower = -np.inf
+    for upper, offsets in STAR_PATTERNS:
+        chosen = (magnitudes > lower) & (magnitudes <= upper)
+        lower = upper
+        for ox, oy in offsets:
+            px, py = dot_x[chosen] + ox, dot_y[chosen] + oy
+            inside = (0 <= px) & (px < w * 2) & (0 <= py) & (py < h * 4)
+            bitmap[py[inside], px[inside]] = True
+    return bitmap
+
+def draw_circle_braille(stdscr, y, x, radius, illumination=1.0, color_attr=None, has_rings=False, ring_attr=None):
+    # braille version of draw_circle: same lighting, dithered on the dot grid
+    if color_attr is None:
+        color_attr = curses.color_pair(1) | curses.A_BOLD
+    cos_phase_angle = max(-1.0, min(1.0, 2.0 * illumination - 1.0))
+    lx = math.sqrt(1.0 - cos_phase_angle**2)
+    lz = cos_phase_angle
+
+    # dots are roughly square: 4 per cell vertically, 2 per (half as wide) cell horizontally
+    r_dots = radius * 4
+    extent_y = int(r_dots * 1.2) if has_rings else r_dots
+    extent_x = int(r_dots * 2.3) if has_rings else r_dots
+    cell_h = (2 * extent_y) // 4 + 2
+    cell_w = (2 * extent_x) // 2 + 2
+    origin_y = int(y + 0.5) - cell_h // 2
+    origin_x = int(x + 0.5) - cell_w // 2
+
+    # dot centres relative to the disc centre
+    dy, dx = np.mgrid[0:cell_h * 4, 0:cell_w * 2]
+    py = (dy + 0.5 - cell_h * 2) / r_dots
+    px = (dx + 0.5 - cell_w) / r_dots
+    dist = np.sqrt(px * px + py * py)
+    sphere = dist <= 1.0
+
+    # lambert shading, then ordered dithering so brightness becomes dot density
+    pz = np.sqrt(np.clip(1.0 - px * px - py * py, 0.0, 1.0))
+    brightness = np.clip(px * lx + pz * lz, 0.0, 1.0)
+    threshold = BAYER_4X4[dy % 4, dx % 4]
+    lit = sphere & (brightness > 0.001) & (brightness > threshold * 0.9)
+    dark = sphere & (brightness <= 0.001) & (dist > 1.0 - 1.5 / r_dots) # limb of the night side
+
+    layers = [(dark, curses.color_pair(2) | curses.A_BOLD), (lit, color_attr)]
+    if has_rings:
+        ring_dist = np.sqrt(px * px + (py * 3.0) ** 2)
+        rings = ~sphere & (ring_dist > 1.4) & (ring_dist < 2.3) & ((dx + dy) % 2 == 0)
+        layers.insert(1, (rings, ring_attr if ring_attr is not None else color_attr))
+
+    # each cell takes the colour of the top-most layer that has dots in it
+    codes = braille_pack(np.logical_or.reduce([layer for layer, _ in layers]))
+    for layer, attr in layers:
+        owned = braille_pack(layer) != 0x2800
+        for cy, cx in zip(*np.nonzero(owned)):
+            s_addch(stdscr, origin_y + cy, origin_x + cx, chr(codes[cy, cx]), attr)
+
+
+def display_almanac(stdscr, table, tz, site):
+    # daily almanac for the site, 'left/right' walks through the cached week
+    stdscr.nodelay(0)
+    start = datetime.date.fromisoformat(table['start'])
+    day = 0
+
+    def local(iso):
+        return parse_time(iso).astimezone(tz)
+
+    while True:
+        stdscr.clear()
+        h, w = stdscr.getmaxyx()
+        date = start + datetime.timedelta(days=day)
+        on_day = lambda iso: local(iso).date() == date
+        hhmm = lambda isos: " ".join(local(iso).strftime('%Hh%M') for iso in isos if on_day(iso)) or "--"
+
+        lines = [(f"--- ALMANAC: {site}, {date.strftime('%a %d %b %Y')} ---", curses.A_BOLD), ("", 0)]
+        lines.append((f"{'':<10}{'Rise':<14}{'Transit':<14}{'Set':<14}", curses.A_DIM))
+        for name, events in table['bodies'].items():
+            row = f"{name:<10}{hhmm(events['rise']):<14}{hhmm(events['transit']):<14}{hhmm(events['set']):<14}"
+            lines.append((row, 0))
+
+        # moon phase at moonrise
+        moon = table['bodies'].get("Moon")
+        if moon:
+            for iso, phase, illum in zip(moon['rise'], moon['phase'], moon['illum']):
+                if on_day(iso):
+                    lines.append((f"Moon phase at rise: {phase:.0f}° ({illum*100:.0f}% lit)", curses.color_pair(2)))
+
+        lines.append(("", 0))
+        lines.append(("Twilight:", curses.A_BOLD))
+        for iso, level in table['twilight']:
+            if on_day(iso):
+                lines.append((f"  {local(iso).strftime('%Hh%M')}  {TWILIGHT_NAMES[level]}", 0))
+
+        for i, (line, attr) in enumerate(lines):
+            if 2 + i < h - 2:
+                try: stdscr.addstr(2 + i, 2, line[:w-3], attr)
+                except: pass
+        foot = "'left/right' change day, 'a' or 'q' to return"
+        try: stdscr.addstr(h-2, w//2 - len(foot)//2, foot, curses.A_DIM)
+        except: pass
+
+        key = stdscr.getch()
+        if key == curses.KEY_RIGHT: day = min(table['days'] - 1, day + 1)
+        elif key == curses.KEY_LEFT: day = max(0, day - 1)
+        elif key in (ord('a'), ord('q'), 27): break
+    stdscr.nodelay(1)
+
+
+def display_forecast(stdscr, load_year, tz, site, year):
+    # upcoming sky events, 'left/right' changes year; load_year(year) computes or reads the cache
+    stdscr.nodelay(0)
+    events = None
+    error = None
+    scroll = 0
+    now = datetime.datetime.now(datetime.timezone.utc)
+    kind_attr = {"conjunction": curses.color_pair(4), "occultation": curses.color_pair(2), "eclipse": curses.color_pair(3) | curses.A_BOLD}
+
+    while True:
+        stdscr.clear()
+        h, w = stdscr.getmaxyx()
+        if events is None:
+            msg = f"computing forecast for {year}..."
+            stdscr.addstr(h//2, w//2 - len(msg)//2, msg, curses.A_BLINK)
+            stdscr.refresh()
+            try:
+                events = [e for e in load_year(year) if parse_time(e['time']) >= now]
+                error = None
+            except Exception as e:
+                # a worker died (missing ephemeris, broken pool...), keep the session alive
+                events, error = [], str(e) or type(e).__name__
+            scroll = 0
+            continue
+
+        title = f"--- FORECAST: {site}, {year} ({len(events)} events) ---"
+        try: stdscr.addstr(2, 2, title[:w-3], curses.A_BOLD)
+        except: pass
+        rows = max(1, h - 7)
+        if error:
+            try: stdscr.addstr(4, 2, f"forecast failed: {error}"[:w-3])
+            except: pass
+        elif not events:
+            try: stdscr.addstr(4, 2, "no upcoming events")
+            except: pass
+        for i, event in enumerate(events[scroll:scroll + rows]):
+            when = parse_time(event['time']).astimezone(tz).strftime('%d %b %Hh%M')
+            line = f"{when}  {event['title']:<32} {event['detail']}"
+            try: stdscr.addstr(4 + i, 2, line[:w-3], kind_attr.get(event['kind'], 0))
+            except: pass
+        foot = "'up/down' scroll, 'left/right' change year, 'f' or 'q' to return"
+        try: stdscr.addstr(h-2, w//2 - len(foot)//2, foot, curses.A_DIM)
+        except: pass
+
+        key = stdscr.getch()
+        if key == curses.KEY_DOWN: scroll = min(max(0, len(events) - rows), scroll + 1)
+        elif key == curses.KEY_UP: scroll = max(0, scroll - 1)
+        elif key == curses.KEY_RIGHT: year += 1; events = None
+        elif key == curses.KEY_LEFT and year > now.year: year -= 1; events = None
+        elif key in (ord('f'), ord('q'), 27): break
+    stdscr.nodelay(1)
@@ -2,7 +2,7 @@ import curses
 import math
 import time
 import requests
-from skyfield.api import wgs84
+import numpy as np
 
 RAW_MAP = """
    :::::::::::''  ''::'      '::::::  `:::::::::::::'.:::::::::::::::
@@ -47,10 +47,13 @@ def project_mercator(lat, lon, map_width, map_height):
     
     return x, y
 
-def display_map(stdscr, objects, ts):
+def display_map(stdscr, objects, engine, conjunctions=None):
     # force into list
     if not isinstance(objects, (list, tuple)):
         objects = [objects]
+    # satellites involved in a close approach get highlighted (by NORAD id, names repeat)
+    conjunctions = conjunctions or []
+    flagged = {c['a_satnum'] for c in conjunctions} | {c['b_satnum'] for c in conjunctions}
 
     stdscr.nodelay(1)
     
@@ -59,8 +62,11 @@ def display_map(stdscr, objects, ts):
         curses.init_pair(10, curses.COLOR_RED, curses.COLOR_BLACK)
         RED_BOLD = curses.color_pair(10) | curses.A_BOLD
         curses.init_pair(11, curses.COLOR_WHITE, curses.COLOR_BLACK) # fallback
+        curses.init_pair(12, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        FLAGGED = curses.color_pair(12) | curses.A_BOLD | curses.A_REVERSE
     except:
         RED_BOLD = curses.A_BOLD | curses.A_REVERSE
+        FLAGGED = curses.A_BOLD | curses.A_REVERSE
 
     # load map text and strip tariling spaces
     map_lines = [line.lstrip() for line in RAW_MAP.split("\n") if line.strip()]
@@ -77,19 +83,16 @@ def display_map(stdscr, objects, ts):
         start_y = max(1, (sh - map_height) // 2)
         start_x = max(0, (sw - map_width) // 2)
 
-        timestamp = ts.now()
+        timestamp = engine.now()
         marker_positions.clear()
 
-        # figure out locations for all satellites
-        for obj in objects:
-            geocentric = obj.at(timestamp)
-            subpoint = wgs84.subpoint(geocentric)
-
-            lat = subpoint.latitude.degrees
-            lon = subpoint.longitude.degrees
-
+        # figure out locations for all satellites (one batch)
+        lats, lons = engine.subpoints(objects, timestamp)
+        for obj, lat, lon in zip(objects, lats, lons):
+            if not np.isfinite(lat):
+                continue # decayed
             name = getattr(obj, "name", "SAT")
-            marker_positions.append((lat, lon, name))
+            marker_positions.append((lat, lon, name, obj.model.satnum in flagged))
 
         stdscr.clear()
 
@@ -104,7 +107,7 @@ def display_map(stdscr, objects, ts):
         # draw each marker
         is_focused = (len(objects) == 1)
         
-        for lat, lon, name in marker_positions:
+        for lat, lon, name, is_flagged in marker_positions:
             px, py = project_mercator(lat, lon, map_width, map_height)
             screen_x = start_x + px
             screen_y = start_y + py
@@ -117,7 +120,7 @@ def display_map(stdscr, objects, ts):
             try:
                 # no oob printin
                 if 0 <= screen_y < sh and 0 <= screen_x < sw - 1:
-                    stdscr.addch(screen_y, screen_x, marker_char, RED_BOLD)
+                    stdscr.addch(screen_y, screen_x, marker_char, FLAGGED if is_flagged else RED_BOLD)
             except curses.error:
                 pass
 
@@ -149,14 +152,67 @@ def display_map(stdscr, objects, ts):
                 if 0 <= info_y + 1 < sh:
                     stdscr.addstr(info_y + 1, info_x, "no data available")
             else:
-                for i, (lat, lon, name) in enumerate(marker_positions):
+                for i, (lat, lon, name, is_flagged) in enumerate(marker_positions):
                     line = f"{name}: LAT {lat:.2f}° | LON {lon:.2f}°"
                     if 0 <= info_y + 1 + i < sh: 
-                        stdscr.addstr(info_y + 1 + i, info_x, line)
+                        stdscr.addstr(info_y + 1 + i, info_x, line, FLAGGED if is_flagged else 0)
+            # close approaches underneath
+            approach_y = info_y + 2 + len(marker_positions)
+            for i, c in enumerate(conjunctions):
+                line = f"{c['a_name']} <-> {c['b_name']}: {c['miss_km']:.1f} km"
+                if 0 <= approach_y + i < sh:
+                    stdscr.addstr(approach_y + i, info_x, line[:sw - info_x - 1], FLAGGED)
         except curses.error:
             pass
 
         stdscr.refresh()
         key = stdscr.getch()
         if key == ord('m') or key == ord('q'):
-            break
\ No newline at end of file
+            break
+
+def display_conjunctions(stdscr, screener, engine, tz):
+    # list of upcoming close approaches, 'm' shows the selected pair on the map
+    stdscr.nodelay(1)
+    selected = 0
+
+    while True:
+        sh, sw = stdscr.getmaxyx()
+        stdscr.clear()
+        try:
+            stdscr.addstr(0, 0, "'up/down' select, 'm' show on map, 'c' or 'q' to return ", curses.A_REVERSE)
+            title = f"--- CLOSE APPROACHES (next {screener.hours:.0f}h, < {screener.threshold_km:.0f} km) ---"
+            stdscr.addstr(2, 2, title[:sw - 3], curses.A_BOLD)
+
+            if not screener.is_done():
+                stdscr.addstr(4, 2, f"screening {len(screener.satellites)} satellites...")
+            elif screener.error:
+                stdscr.addstr(4, 2, f"screening failed: {screener.error}"[:sw - 3])
+            elif not screener.results:
+                stdscr.addstr(4, 2, "no close approaches found")
+            else:
+                results = screener.results
+                selected = min(selected, len(results) - 1)
+                visible_rows = max(1, sh - 6)
+                first = max(0, selected - visible_rows + 1)
+                for row, c in enumerate(results[first:first + visible_rows]):
+                    tca = c['tca'].astimezone(tz).strftime('%d %b %Hh%M:%S')
+                    line = f"{c['a_name'][:18]:<18} <-> {c['b_name'][:18]:<18} {c['miss_km']:7.2f} km  {tca}"
+                    attr = curses.A_REVERSE if first + row == selected else 0
+                    stdscr.addstr(4 + row, 2, line[:sw - 3], attr)
+        except curses.error:
+            pass
+
+        stdscr.refresh()
+        key = stdscr.getch()
+        if key == ord('c') or key == ord('q'):
+            break
+        if screener.is_done() and screener.results:
+            if key == curses.KEY_UP:
+                selected = max(0, selected - 1)
+            elif key == curses.KEY_DOWN:
+                selected = min(len(screener.results) - 1, selected + 1)
+            elif key == ord('m'):
+                c = screener.results[selected]
+                # results index into the screened list, names alone can repeat
+                pair = [screener.satellites[c['a']], screener.satellites[c['b']]]
+                display_map(stdscr, pair, engine, [c])
@@ -0,0 +1,27 @@
+from sky_engine import illuminated_fraction
+
+class FrameContext:
+    # everything a frame needs that does not depend on a single body,
+    # computed once per pass of the main loop instead of once per body
+    def __init__(self, engine, tz):
+        self.engine = engine
+        self.t = engine.now()
+        self.local_time = self.t.astimezone(tz) # site clock for the status bar
+        self._moon_illum = None
+        self._positions = None
+
+    def positions(self):
+        # every tracked body in one batch query (alt/az, ra/dec, distance, unit vectors)
+        if self._positions is None:
+            self._positions = self.engine.positions(list(self.engine.bodies.keys()), self.t)
+        return self._positions
+
+    def moon_illumination(self):
+        # illuminated fraction from the moon and sun positions of this frame's batch
+        # (phase angle seen from the site), so it costs no extra ephemeris lookups
+        if self._moon_illum is None:
+            pos = self.positions()
+            moon, sun = pos['index']["Moon"], pos['index']["Sun"]
+            self._moon_illum = float(illuminated_fraction(pos['xyz'][moon] * pos['distance_km'][moon],
+                                                          pos['xyz'][sun] * pos['distance_km'][sun]))
+        return self._moon_illum
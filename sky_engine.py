@@ -0,0 +1,149 @@
+import numpy as np
+from sgp4.api import SatrecArray
+from skyfield.constants import AU_KM, DAY_S
+from skyfield.positionlib import Geocentric
+from skyfield.sgp4lib import EarthSatellite, TEME
+from skyfield.api import wgs84
+
+STAR_REFRESH_DAYS = 1.0 / 24 # how long star directions are reused
+def sgp4_epoch(t):
+    # split a skyfield Time (scalar or array) into the UTC (jd, fraction) that SGP4 expects
+    jd = np.atleast_1d(t.whole)
+    fraction = np.atleast_1d(t.tai_fraction - t._leap_seconds() / DAY_S)
+    return jd, fraction
+
+def stereographic(xyz, center):
+    # skyfield's build_stereographic_projection, on raw unit vectors shaped (3, ...)
+    x_c, y_c, z_c = center
+    x, y, z = xyz
+    t0 = 1 / np.sqrt(x_c**2 + y_c**2)
+    t1 = x * x_c
+    t2 = np.sqrt(1 - z_c**2)
+    t3 = t0 * t2
+    t4 = y * y_c
+    t5 = 1 / (t1 * t3 + t3 * t4 + z * z_c + 1)
+    t6 = t0 * z_c
+    return t0 * t5 * (x * y_c - x_c * y), -t5 * (t1 * t6 - t2 * z + t4 * t6)
+
+def illuminated_fraction(body_km, sun_km):
+    # lit fraction of a body's disc from observer -> body and observer -> sun vectors (3, ...),
+    # phase angle taken at the body between the observer and the sun
+    to_sun = sun_km - body_km
+    cos_phase = -(body_km * to_sun).sum(axis=0) / (np.linalg.norm(body_km, axis=0) * np.linalg.norm(to_sun, axis=0))
+    return 0.5 * (1.0 + cos_phase)
+
+def screen_projection(xyz, center, fov, h, w):
+    # unit vectors -> terminal cells (sx, sy) and squared distance from the view centre
+    x, y = stereographic(xyz, center)
+    sx = (x / (fov/2) + 1) * (w / 2)
+    sy = (-y / (fov/2) + 1) * (h / 2)
+    return sx, sy, x * x + y * y
+
+class SkyEngine:
+    # all of the astronomy behind the views, with no curses in sight.
+    # built from what load_data returns; every query takes a Time that is
+    # either a single instant or an array, and returns NumPy arrays
+    def __init__(self, ts, planets, observer, topos_observer, bodies, stars=None, ephemeris_table=None):
+        self.ts = ts
+        self.planets = planets
+        self.observer = observer
+        self.topos = topos_observer
+        self.bodies = bodies # shared with the caller, targets added later are picked up
+        self.stars = stars
+        self.table = ephemeris_table # precomputed tables (ephemeris_tables.py), used for single instants
+        self._sat_arrays = {}
+        self._star_cache = None # (tt, directions)
+
+    def now(self):
+        return self.ts.now()
+
+    def _as_array(self, t):
+        # (array Time, whether the caller passed a single instant)
+        if np.ndim(t.tt) == 0:
+            return self.ts.tt_jd(np.atleast_1d(t.tt)), True
+        return t, False
+
+    def satellite_vectors(self, satellites, t):
+        # geocentric GCRS positions (n, 3, m) in km, every satellite in one SGP4 call
+        key = tuple(id(sat) for sat in satellites)
+        sat_array = self._sat_arrays.get(key)
+        if sat_array is None:
+            if len(self._sat_arrays) > 32: # map views of arbitrary pairs come and go
+                self._sat_arrays.clear()
+            sat_array = self._sat_arrays[key] = SatrecArray([sat.model for sat in satellites])
+        errors, r_teme, _ = sat_array.sgp4(*sgp4_epoch(t))
+        r_teme[errors != 0] = np.nan
+        return np.einsum('nmi,ijm->njm', r_teme, TEME.rotation_at(t))
+
+    def topocentric(self, names, t):
+        # observer -> body vectors (n, 3, m) in km, t must be an array Time
+        out = np.empty((len(names), 3, len(t)))
+        observer_km = self.topos.at(t).xyz.km
+        sat_rows, other_rows = [], []
+        for i, name in enumerate(names):
+            (sat_rows if isinstance(self.bodies[name], EarthSatellite) else other_rows).append(i)
+        if sat_rows:
+            sats = [self.bodies[names[i]] for i in sat_rows]
+            out[sat_rows] = self.satellite_vectors(sats, t) - observer_km
+
+        observer_at = None
+        from_horizon = None # horizon frame -> GCRS, shared by every table row
+        for i in other_rows:
+            name = names[i]
+            row = self.table.lookup(name, t[0]) if self.table is not None and len(t) == 1 else None
+            if row is not None:
+                # precomputed alt/az/distance, rotated back out of the horizon frame
+                alt, az, dist_au = np.radians(row[0]), np.radians(row[1]), row[4]
+                local = np.array([np.cos(alt) * np.cos(az), np.cos(alt) * np.sin(az), np.sin(alt)])
+                if from_horizon is None:
+                    from_horizon = self.topos.rotation_at(t)[:, :, 0].T
+                out[i, :, 0] = from_horizon @ local * dist_au * AU_KM
+                continue
+            if observer_at is None:
+                observer_at = self.observer.at(t)
+            out[i] = observer_at.observe(self.bodies[name]).apparent().xyz.km
+        return out
+
+    def positions(self, names, t):
+        # alt/az (degrees), ra (hours), dec (degrees), distance_km and unit vectors 'xyz'
+        # for every name at every time: arrays shaped (n, m), or (n,) for a single instant.
+        # screen_projection() maps 'xyz' onto the terminal
+        t_array, scalar = self._as_array(t)
+        vectors = self.topocentric(names, t_array)
+        distance = np.linalg.norm(vectors, axis=1)
+        unit = vectors / distance[:, None, :]
+        local = np.einsum('ijm,njm->nim', self.topos.rotation_at(t_array), unit)
+
+        result = {
+            'index': {name: i for i, name in enumerate(names)},
+            'alt': np.degrees(np.arcsin(np.clip(local[:, 2], -1.0, 1.0))),
+            'az': np.degrees(np.arctan2(local[:, 1], local[:, 0])) % 360.0,
+            'ra': (np.degrees(np.arctan2(unit[:, 1], unit[:, 0])) / 15.0) % 24.0,
+            'dec': np.degrees(np.arcsin(np.clip(unit[:, 2], -1.0, 1.0))),
+            'distance_km': distance,
+            'xyz': unit,
+        }
+        if scalar:
+            result = {key: value[..., 0] if key != 'index' else value for key, value in result.items()}
+        return result
+
+    def look_direction(self, t, alt, az):
+        # unit vector of a point on the sky given in alt/az (the camera centre)
+        alt, az = np.radians(alt), np.radians(az)
+        local = np.array([np.cos(alt) * np.cos(az), np.cos(alt) * np.sin(az), np.sin(alt)])
+        return self.topos.rotation_at(t).T @ local
+
+    def star_directions(self, t):
+        # unit vectors (3, s) of the loaded stars at a single instant. they only drift
+        # with aberration (arcseconds per hour), so the ephemeris is consulted once an hour
+        if self._star_cache is None or abs(t.tt - self._star_cache[0]) > STAR_REFRESH_DAYS:
+            xyz = self.observer.at(t).observe(self.stars).xyz.au
+            self._star_cache = (t.tt, xyz / np.linalg.norm(xyz, axis=0))
+        return self._star_cache[1]
+
+    def subpoints(self, satellites, t):
+        # (lat, lon) in degrees under each satellite at a single instant
+        t_array, _ = self._as_array(t)
+        r_au = self.satellite_vectors(satellites, t_array)[:, :, 0].T / AU_KM
+        lat, lon = wgs84.latlon_of(Geocentric(r_au, t=t))
+        return lat.degrees, lon.degrees
@@ -0,0 +1,167 @@
+import bisect
+from collections import Counter, defaultdict
+
+# common names of bright stars -> Hipparcos number
+STAR_NAMES = {
+    "Sirius": 32349, "Canopus": 30438, "Arcturus": 69673, "Rigil Kentaurus": 71683,
+    "Vega": 91262, "Capella": 24608, "Rigel": 24436, "Procyon": 37279,
+    "Achernar": 7588, "Betelgeuse": 27989, "Hadar": 68702, "Altair": 97649,
+    "Acrux": 60718, "Aldebaran": 21421, "Antares": 80763, "Spica": 65474,
+    "Pollux": 37826, "Fomalhaut": 113368, "Deneb": 102098, "Mimosa": 62434,
+    "Regulus": 49669, "Adhara": 33579, "Castor": 36850, "Shaula": 85927,
+    "Gacrux": 61084, "Bellatrix": 25336, "Elnath": 25428, "Miaplacidus": 45238,
+    "Alnilam": 26311, "Alnair": 109268, "Alnitak": 26727, "Alioth": 62956,
+    "Dubhe": 54061, "Mirfak": 15863, "Wezen": 34444, "Sargas": 86228,
+    "Kaus Australis": 90185, "Avior": 41037, "Alkaid": 67301, "Menkalinan": 28360,
+    "Atria": 82273, "Alhena": 31681, "Peacock": 100751, "Polaris": 11767,
+    "Mirzam": 30324, "Alphard": 46390, "Hamal": 9884, "Algieba": 50583,
+    "Diphda": 3419, "Nunki": 92855, "Menkent": 68933, "Mirach": 5447,
+    "Alpheratz": 677, "Rasalhague": 86032, "Kochab": 72607, "Saiph": 27366,
+    "Denebola": 57632, "Algol": 14576, "Mizar": 65378,
+}
+
+# extra names for the bodies we track
+ALIASES = {
+    "ISS": ["International Space Station", "Zarya"],
+    "Tiangong": ["CSS", "Chinese Space Station", "Tianhe"],
+    "Hubble": ["HST", "Hubble Space Telescope"],
+}
+
+MAX_HEAD_CANDIDATES = 200 # names compared by edit distance per query
+
+STAR_LABELS = {hip: name for name, hip in STAR_NAMES.items()}
+
+def star_label(hip):
+    return STAR_LABELS.get(hip, f"HIP {hip}")
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+def bigrams(text):
+    # padded so first and last letters count on their own ("mras" still meets "mars")
+    padded = f"${text}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+def split_digits(text):
+    # ("starlink-", "1234") for "starlink-1234": the text before the first digit, and the rest
+    for i, c in enumerate(text):
+        if c.isdigit():
+            return text[:i], text[i:]
+    return text, ""
+
+def edit_distance(a, b, limit):
+    # levenshtein distance with swapped letters counting as one edit,
+    # gives up (returns limit + 1) once every path is over limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+class TargetIndex:
+    # search terms -> targets. prefixes come from a sorted term list (bisect). typos are
+    # matched against the distinct word parts of the terms ("starlink-", "cosmos ", "vega"),
+    # through a bigram inverted index, then expanded back to terms with another bisect.
+    # catalogs repeat a handful of names thousands of times, so this stays small
+    def __init__(self):
+        self.targets = [] # (label, kind, ref)
+        self._terms = [] # (normalized term, target id)
+        self._sorted = []
+        self._heads = [] # distinct text before the first digit of any term
+        self._grams = defaultdict(list) # bigram -> head ids
+
+    def add(self, label, kind, ref, terms):
+        target_id = len(self.targets)
+        self.targets.append((label, kind, ref))
+        for term in {normalize(t) for t in terms if t}:
+            self._terms.append((term, target_id))
+
+    def build(self):
+        self._sorted = sorted((term, term_id) for term_id, (term, _) in enumerate(self._terms))
+        self._heads = sorted({head for head, _ in (split_digits(term) for term, _ in self._terms) if head.strip()})
+        self._grams = defaultdict(list)
+        for head_id, head in enumerate(self._heads):
+            for gram in bigrams(head):
+                self._grams[gram].append(head_id)
+
+    def _prefixed(self, prefix, limit):
+        # term ids starting with prefix, at most limit of them
+        found = []
+        i = bisect.bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and self._sorted[i][0].startswith(prefix) and len(found) < limit:
+            found.append(self._sorted[i])
+            i += 1
+        return found
+
+    def search(self, query, limit=8):
+        # best targets first: exact, then prefix, then close spellings
+        q = normalize(query)
+        if not q:
+            return []
+        ranked = {} # target id -> (tier, distance, term length)
+
+        def offer(term_id, rank):
+            target_id = self._terms[term_id][1]
+            if target_id not in ranked or rank < ranked[target_id]:
+                ranked[target_id] = rank
+
+        ## prefix range in the sorted terms
+        for term, term_id in self._prefixed(q, limit * 4):
+            offer(term_id, (0 if term == q else 1, 0, len(term)))
+
+        ## typo tolerance on the part before any digits; the digits themselves must be typed right
+        q_head, q_tail = split_digits(q)
+        if len(q_head.strip()) >= 3 and len(ranked) < limit:
+            shared = Counter()
+            for gram in bigrams(q_head):
+                shared.update(self._grams.get(gram, ()))
+            max_typos = max(1, len(q_head) // 4)
+            for head_id, _ in shared.most_common(MAX_HEAD_CANDIDATES):
+                head = self._heads[head_id]
+                distance = edit_distance(q_head, head, max_typos)
+                prefix = head + q_tail
+                if distance > max_typos and not q_tail:
+                    # still typing the name: compare against as much of it as was typed
+                    distance = edit_distance(q_head, head[:len(q_head)], max_typos)
+                    prefix = head[:len(q_head)]
+                if distance <= max_typos:
+                    for term, term_id in self._prefixed(prefix, limit * 4):
+                        offer(term_id, (2, distance, len(term)))
+
+        best = sorted(ranked, key=lambda target_id: ranked[target_id])[:limit]
+        return [self.targets[target_id] for target_id in best]
+
+def build_target_index(bodies, sat_catalog, star_table):
+    # planets and tracked satellites, the whole satellite catalog (name and NORAD id)
+    # and bright stars (common name and HIP number)
+    index = TargetIndex()
+    tracked = {id(body): name for name, body in bodies.items()}
+    for name, body in bodies.items():
+        terms = [name] + ALIASES.get(name, [])
+        model = getattr(body, "model", None)
+        if model is not None:
+            terms.append(str(model.satnum))
+            terms.append(body.name)
+        index.add(name, "body", name, terms)
+
+    for sat in sat_catalog:
+        if id(sat) in tracked:
+            continue
+        index.add(sat.name, "satellite", sat, [sat.name, str(sat.model.satnum)])
+
+    for hip in star_table.index:
+        label = star_label(hip)
+        index.add(label, "star", int(hip), [label, f"HIP {hip}", str(hip)])
+
+    index.build()
+    return index
@@ -0,0 +1,66 @@
+import numpy as np
+from skyfield.constants import ERAD
+from skyfield.geometry import intersect_line_and_sphere
+
+# standard magnitude (1000 km away, 50% illuminated) for the satellites we know
+# https://www.prismnet.com/~mmccants/tles/mccdesc.html
+STANDARD_MAGNITUDES = {
+    "ISS": -1.8,
+    "Hubble": 2.2,
+    "Tiangong": -0.3,
+    "Copernicus": 4.0,
+}
+DEFAULT_STANDARD_MAGNITUDE = 4.5 # typical for the rest of the visual group
+NAKED_EYE_LIMIT = 4.5 # faintest magnitude we call "visible"
+TWILIGHT_SUN_ALT = -6.0 # sky has to be at least this dark (civil twilight)
+
+class SatelliteVisibility:
+    # sunlight and brightness for every loaded satellite at once, from the
+    # batch positions the SkyEngine already produced for the frame (no extra
+    # propagation), so this stays cheap with big catalogs.
+    def __init__(self, names):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._std_mag = np.array([STANDARD_MAGNITUDES.get(name, DEFAULT_STANDARD_MAGNITUDE) for name in self.names])
+
+        n = len(self.names)
+        self.magnitude = np.full(n, np.nan)
+        self.sunlit = np.zeros(n, dtype=bool)
+        self.visible = np.zeros(n, dtype=bool)
+        self.sky_is_dark = False
+
+    def update(self, engine, t, positions):
+        # positions: engine.positions() at t covering these satellites and the Sun
+        if not self.names:
+            return
+        rows = [positions['index'][name] for name in self.names]
+        sun = positions['index']["Sun"]
+        range_km = positions['distance_km'][rows]
+        alt = positions['alt'][rows]
+        failed = ~np.isfinite(range_km)
+
+        observer_km = engine.topos.at(t).xyz.km
+        topocentric = (positions['xyz'][rows] * range_km[:, None]).T # (3, n) observer -> satellite
+        r_gcrs = topocentric + observer_km[:, None] # earth center -> satellite
+
+        ## earth shadow: is the line from each satellite to the sun blocked by the earth?
+        sun_km = observer_km + positions['xyz'][sun] * positions['distance_km'][sun] # earth center -> sun
+        earth_km = -r_gcrs # satellite -> earth center
+        _, far = intersect_line_and_sphere(sun_km[:, None] + earth_km, earth_km, ERAD / 1000.0)
+        self.sunlit = np.nan_to_num(far) <= 0
+
+        ## visual magnitude from phase angle (sun - satellite - observer)
+        to_sun = sun_km[:, None] + earth_km
+        to_observer = -topocentric
+        cos_phase = (to_sun * to_observer).sum(axis=0) / (np.linalg.norm(to_sun, axis=0) * range_km)
+        illuminated = np.clip((1.0 + cos_phase) / 2.0, 1e-6, 1.0)
+        self.magnitude = self._std_mag - 15.75 + 2.5 * np.log10(range_km ** 2 / illuminated)
+
+        ## only sunlit objects above the horizon in a dark sky can be seen
+        self.sky_is_dark = positions['alt'][sun] < TWILIGHT_SUN_ALT
+        self.visible = (alt > 0) & self.sunlit & (self.magnitude <= NAKED_EYE_LIMIT) & ~failed
+        self.visible &= self.sky_is_dark
+
+    def is_visible(self, name):
+        i = self.index.get(name)
+        return i is not None and bool(self.visible[i])